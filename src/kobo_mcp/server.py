@@ -1,39 +1,663 @@
 """KoboToolbox MCP Server - Deploy surveys and fetch submissions."""
 
+import asyncio
 import json
+import operator
 import os
+import random
 import sys
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Iterable, Mapping
+from contextlib import asynccontextmanager, nullcontext
+from types import MappingProxyType
 from typing import Any
 
+import anyio
 import httpx
 from mcp.server.fastmcp import FastMCP
 
-# Server instance
-mcp = FastMCP("kobotoolbox")
+try:
+    import orjson
+except ImportError:  # Optional speedup, install with kobo-mcp[fast]
+    orjson = None
+
+try:
+    import uvloop
+except ImportError:  # Not available on Windows; asyncio's own loop is used
+    uvloop = None
+
+
+# API paths, relative to the shared client's base_url
+ASSETS_PATH = "/api/v2/assets/"
+IMPORTS_PATH = "/api/v2/imports/"
 
 # Configuration from environment
 KOBO_API_TOKEN = os.environ.get("KOBO_API_TOKEN", "")
 KOBO_SERVER = os.environ.get("KOBO_SERVER", "https://kf.kobotoolbox.org")
+# Ask the server to hold status requests open (?wait=N) instead of polling rapidly
+KOBO_LONG_POLL = os.environ.get("KOBO_LONG_POLL") == "1"
+LONG_POLL_WAIT = 30
+# Content type for XLSForm uploads
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+# Timeouts for GETs, which are retried on transient failures. Connecting and
+# waiting for a pooled connection fail fast so a retry can take over; reads
+# get longer for submission pages and file downloads.
+GET_TIMEOUT = httpx.Timeout(connect=3.0, read=20.0, write=20.0, pool=2.0)
+DOWNLOAD_TIMEOUT = httpx.Timeout(connect=3.0, read=60.0, write=20.0, pool=2.0)
+# How long cached form metadata is served without asking the server
+CACHE_TTL = 30.0
+# Most responses kept in the cache, and how long past expiry an entry is
+# kept around for ETag revalidation before it's dropped
+CACHE_MAX_ENTRIES = 128
+CACHE_STALE_TTL = 300.0
+# Statuses worth retrying a GET for; writes are only retried on 429
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+WRITE_RETRY_STATUSES = frozenset({429})
+# Page size used when resolve_form scans the asset list
+RESOLVE_PAGE_SIZE = 200
+# Largest page requested from the submissions endpoint in one call
+SUBMISSIONS_PAGE_SIZE = 1000
+# Maximum number of requests in flight at once, across all tool calls
+KOBO_MAX_CONCURRENCY = int(os.environ.get("KOBO_MAX_CONCURRENCY", "8"))
+
+# Held around every request sent to the server
+_FETCH_SEM = asyncio.Semaphore(KOBO_MAX_CONCURRENCY)
+
+# Authorization headers, built once from the token (None if it isn't set)
+_AUTH_HEADERS: Mapping[str, str] | None = (
+    MappingProxyType({"Authorization": f"Token {KOBO_API_TOKEN}"}) if KOBO_API_TOKEN else None
+)
+
+# Shared HTTP/2 client, created on first use so connections are pooled across tool calls
+_client: httpx.AsyncClient | None = None
+
+# Running export_data jobs keyed by (form_uid, export_type, include_labels)
+_inflight_exports: dict[tuple[str, str, bool], asyncio.Task[dict[str, Any] | None]] = {}
+
+# Cached GET bodies keyed by URL: (expiry, ETag, body), least recently
+# used first. Fresh entries are served without a request; stale ones are
+# revalidated with If-None-Match
+_response_cache: OrderedDict[str, tuple[float, str | None, bytes]] = OrderedDict()
+
+# Cleared if the server rejects ?fields= projections, so they're not sent again
+_fields_param_supported = True
+
+
+def get_client() -> httpx.AsyncClient:
+    """Get the shared HTTP client, creating it on first use."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            base_url=KOBO_SERVER,
+            headers=_AUTH_HEADERS or {},
+            http2=True,
+            limits=httpx.Limits(max_connections=32, max_keepalive_connections=16),
+            timeout=httpx.Timeout(60.0),
+        )
+    return _client
 
 
-def get_headers() -> dict[str, str]:
-    """Get authorization headers for API requests."""
-    if not KOBO_API_TOKEN:
-        raise ValueError("KOBO_API_TOKEN environment variable is not set")
-    return {"Authorization": f"Token {KOBO_API_TOKEN}"}
+@asynccontextmanager
+async def lifespan(server: FastMCP) -> AsyncIterator[None]:
+    """Close the shared HTTP client when the server shuts down."""
+    global _client
+    try:
+        yield
+    finally:
+        if _client is not None:
+            await _client.aclose()
+            _client = None
+
+
+# Server instance
+mcp = FastMCP("kobotoolbox", lifespan=lifespan)
+
+
+def _loads(content: bytes) -> Any:
+    """Parse a JSON response body, using orjson when available."""
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+def _dumps(obj: Any) -> str:
+    """Serialize a tool result as compact JSON, using orjson when available.
+
+    Tool output is read by MCP clients rather than people, so it skips
+    indentation to keep responses small.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+
+
+def _passthrough(response: httpx.Response, data: Any, required_keys: Iterable[str]) -> str | None:
+    """Return the raw response body if it already has every key a tool returns.
+
+    This skips re-serializing large payloads. Extra top-level keys the
+    server sends along are kept. Returns None when a key is missing, so the
+    caller can build the result itself.
+    """
+    if isinstance(data, dict) and data.keys() >= set(required_keys):
+        return response.text
+    return None
+
+
+# Asset fields shown by format_asset, and the names they are shown under
+_ASSET_FIELDS = (
+    "uid",
+    "name",
+    "asset_type",
+    "deployment_status",
+    "deployment__submission_count",
+    "date_created",
+    "date_modified",
+    "owner__username",
+)
+_ASSET_DISPLAY_KEYS = (
+    "uid",
+    "name",
+    "asset_type",
+    "deployment_status",
+    "submission_count",
+    "date_created",
+    "date_modified",
+    "owner",
+)
+_ASSET_DEFAULTS = {"deployment__submission_count": 0}
+_get_asset_fields = operator.itemgetter(*_ASSET_FIELDS)
+
+# Field projections (?fields=) so the API only sends what each tool reports
+LIST_FORMS_FIELDS = ",".join(_ASSET_FIELDS)
+RESOLVE_FORM_FIELDS = "uid,name,deployment__links"
+GET_FORM_FIELDS = ",".join(
+    (
+        "uid",
+        "name",
+        "deployment_status",
+        "deployment__links",
+        "deployment__submission_count",
+        "date_created",
+        "date_modified",
+        "owner__username",
+        "content",
+    )
+)
 
 
 def format_asset(asset: dict[str, Any]) -> dict[str, Any]:
     """Format an asset object for display."""
+    try:
+        values = _get_asset_fields(asset)
+    except KeyError:
+        # Not every asset has every field (e.g. undeployed drafts)
+        values = tuple(asset.get(field, _ASSET_DEFAULTS.get(field)) for field in _ASSET_FIELDS)
+    return dict(zip(_ASSET_DISPLAY_KEYS, values))
+
+
+def _retry_after(response: httpx.Response) -> float | None:
+    """Read a Retry-After header given in seconds, if there is one."""
+    try:
+        return min(float(response.headers["Retry-After"]), 30.0)
+    except (KeyError, ValueError):
+        return None
+
+
+async def _request_with_retry(
+    client: httpx.AsyncClient,
+    method: str,
+    url: str,
+    *,
+    attempts: int = 3,
+    stream: bool = False,
+    follow_redirects: bool | None = None,
+    authenticated: bool = True,
+    limited: bool = True,
+    **kwargs: Any,
+) -> httpx.Response:
+    """Send a request, retrying transient failures with jittered exponential backoff.
+
+    Each attempt holds a slot in the shared concurrency limit until its
+    response headers arrive; the slot is released while backing off.
+    Pass `limited=False` for requests the server deliberately holds open
+    (long-poll status checks), so waiting on them doesn't starve other
+    tool calls of slots. GETs are retried on connection errors and
+    429/502/503/504 responses. Other methods aren't idempotent, so they
+    are only retried on 429, which the server rejected without acting on.
+    A Retry-After header on the response takes precedence over the
+    computed backoff. The last response is returned (or the last error
+    raised) once `attempts` run out.
+
+    With `stream=True` the body is left unread, and the slot only covers
+    sending the request and receiving the headers; the caller must close
+    the response. With `authenticated=False` the client's Authorization
+    header is left off, for URLs that aren't on the Kobo server.
+    """
+    idempotent = method == "GET"
+    retry_statuses = RETRY_STATUSES if idempotent else WRITE_RETRY_STATUSES
+    redirects = httpx.USE_CLIENT_DEFAULT if follow_redirects is None else follow_redirects
+
+    async def send() -> httpx.Response:
+        request = client.build_request(method, url, **kwargs)
+        if not authenticated:
+            request.headers.pop("Authorization", None)
+        async with _FETCH_SEM if limited else nullcontext():
+            return await client.send(request, stream=stream, follow_redirects=redirects)
+
+    for attempt in range(attempts - 1):
+        retry_after = None
+        try:
+            response = await send()
+        except httpx.TransportError:
+            if not idempotent:
+                raise
+        else:
+            if response.status_code not in retry_statuses:
+                return response
+            retry_after = _retry_after(response)
+            await response.aclose()
+        await asyncio.sleep(retry_after or (random.uniform(0, 0.1) + 0.25 * 2**attempt))
+    return await send()
+
+
+def _is_kobo_url(url: str) -> bool:
+    """Whether a URL is on the Kobo server (relative URLs resolve against it)."""
+    target = httpx.URL(url)
+    if target.is_relative_url:
+        return True
+    server = httpx.URL(KOBO_SERVER)
+    return (target.scheme, target.host, target.port) == (server.scheme, server.host, server.port)
+
+
+async def _retrying_get(client: httpx.AsyncClient, url: str, **kwargs: Any) -> httpx.Response:
+    """GET a URL through _request_with_retry."""
+    return await _request_with_retry(client, "GET", url, **kwargs)
+
+
+async def _cached_get(path: str, params: dict[str, Any] | None = None, ttl: float = CACHE_TTL) -> bytes:
+    """GET a path through the response cache and return the body.
+
+    Entries younger than `ttl` seconds are returned without a request.
+    Older ones are revalidated with If-None-Match when the server gave an
+    ETag, so a 304 reuses the cached body.
+
+    If a request with a `fields` projection gets a 400 and the same
+    request succeeds without it, the server is taken not to support
+    projections and they are dropped from all later requests. Otherwise
+    the 400 came from something else (e.g. a bad search) and is raised.
+    """
+    global _fields_param_supported
+    if params and "fields" in params and not _fields_param_supported:
+        params = {name: value for name, value in params.items() if name != "fields"}
+
+    key = str(httpx.URL(path, params=params))
+    cached = _response_cache.get(key)
+    now = time.monotonic()
+    if cached and cached[0] > now:
+        _response_cache.move_to_end(key)
+        return cached[2]
+
+    etag = cached[1] if cached else None
+    response = await _retrying_get(
+        get_client(),
+        path,
+        params=params,
+        headers={"If-None-Match": etag} if etag else None,
+        timeout=GET_TIMEOUT,
+    )
+    if cached and etag and response.status_code == 304:
+        _cache_store(key, (now + ttl, etag, cached[2]), now)
+        return cached[2]
+    if response.status_code == 400 and params and "fields" in params:
+        unprojected = {name: value for name, value in params.items() if name != "fields"}
+        try:
+            body = await _cached_get(path, unprojected, ttl)
+        except httpx.HTTPStatusError:
+            pass
+        else:
+            _fields_param_supported = False
+            return body
+    response.raise_for_status()
+    _cache_store(key, (now + ttl, response.headers.get("ETag"), response.content), now)
+    return response.content
+
+
+def _cache_store(key: str, entry: tuple[float, str | None, bytes], now: float) -> None:
+    """Add a response cache entry, evicting long-expired and least recently used ones."""
+    _response_cache[key] = entry
+    _response_cache.move_to_end(key)
+    for stale in [k for k, (expiry, _, _) in _response_cache.items() if expiry + CACHE_STALE_TTL < now]:
+        del _response_cache[stale]
+    while len(_response_cache) > CACHE_MAX_ENTRIES:
+        _response_cache.popitem(last=False)
+
+
+def _invalidate_cache() -> None:
+    """Drop cached responses after a write so the next read sees it."""
+    _response_cache.clear()
+
+
+async def _poll_until(
+    client: httpx.AsyncClient,
+    url: str,
+    deadline_s: float,
+    initial: float = 0.1,
+    cap: float = 2.0,
+) -> dict[str, Any] | None:
+    """Poll a Kobo task status endpoint until it completes, fails, or times out.
+
+    Waits between polls double from `initial` up to `cap` seconds, plus up
+    to 25% jitter, so fast tasks return quickly and slow ones don't hammer
+    the server. Sleeps never run past the deadline.
+
+    With KOBO_LONG_POLL=1, each request asks the server to hold the
+    connection open with `?wait=N` until the task changes state. If the
+    server answers immediately anyway (it ignores the parameter), the
+    backoff sleep is used as usual.
+
+    Returns:
+        The last status payload if it reached "complete" or "error",
+        or None if `deadline_s` elapsed first.
+    """
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    deadline = started + deadline_s
+    delay = initial
+    attempt = 0
+    while True:
+        held = False
+        if KOBO_LONG_POLL:
+            wait = max(1, min(LONG_POLL_WAIT, int(deadline - loop.time())))
+            sent = loop.time()
+            response = await _retrying_get(
+                client,
+                url,
+                params={"wait": wait},
+                timeout=httpx.Timeout(30.0, connect=5.0, read=wait + 5.0),
+                # Held open by the server, so kept out of the concurrency limit
+                limited=False,
+            )
+            held = loop.time() - sent >= wait / 2
+        else:
+            response = await _retrying_get(client, url, timeout=GET_TIMEOUT)
+        response.raise_for_status()
+        status_data = _loads(response.content)
+        attempt += 1
+
+        if status_data.get("status") in {"complete", "error"}:
+            break
+        if loop.time() > deadline:
+            status_data = None
+            break
+        if held:
+            # The server waited for us; ask again straight away
+            continue
+
+        jittered = delay + random.uniform(0, delay / 4)
+        await asyncio.sleep(min(jittered, max(0.0, deadline - loop.time())))
+        delay = min(delay * 2, cap)
+
+    elapsed = loop.time() - started
+    print(f"Polled {url} {attempt} times in {elapsed:.1f}s", file=sys.stderr)
+    return status_data
+
+
+async def _fetch_submissions(
+    client: httpx.AsyncClient,
+    form_uid: str,
+    limit: int,
+    start: int = 0,
+    query: str | None = None,
+) -> tuple[int, list[dict[str, Any]]]:
+    """Fetch up to `limit` submissions starting at `start`.
+
+    Requests above SUBMISSIONS_PAGE_SIZE are split into pages fetched
+    concurrently and concatenated in order.
+
+    Returns:
+        The total submission count reported by the server, and the results.
+    """
+    url = f"{ASSETS_PATH}{form_uid}/data/"
+    params: dict[str, Any] = {"limit": min(limit, SUBMISSIONS_PAGE_SIZE), "start": start}
+    if query:
+        params["query"] = query
+
+    response = await _retrying_get(client, url, params=params, timeout=DOWNLOAD_TIMEOUT)
+    response.raise_for_status()
+    data = _loads(response.content)
+    count = data.get("count", 0)
+    results = data.get("results", [])
+
+    if limit > SUBMISSIONS_PAGE_SIZE:
+        # The first page told us the total; fetch the rest concurrently
+        _, rest = await _fetch_submission_pages(
+            client,
+            form_uid,
+            start + SUBMISSIONS_PAGE_SIZE,
+            min(start + limit, count),
+            SUBMISSIONS_PAGE_SIZE,
+            query,
+        )
+        results.extend(rest)
+
+    return count, results
+
+
+async def _fetch_submission_pages(
+    client: httpx.AsyncClient,
+    form_uid: str,
+    start: int,
+    end: int,
+    page_size: int,
+    query: str | None = None,
+) -> tuple[int, list[dict[str, Any]]]:
+    """Fetch submissions from `start` up to `end` as concurrent pages.
+
+    Every page is requested at once (bounded by the shared concurrency
+    limit) and the results are concatenated in offset order.
+
+    Returns:
+        The total submission count reported by the server, and the results.
+    """
+    url = f"{ASSETS_PATH}{form_uid}/data/"
+
+    async def fetch_page(offset: int) -> dict[str, Any]:
+        params: dict[str, Any] = {"limit": min(page_size, end - offset), "start": offset}
+        if query:
+            params["query"] = query
+        response = await _retrying_get(client, url, params=params, timeout=DOWNLOAD_TIMEOUT)
+        response.raise_for_status()
+        return _loads(response.content)
+
+    pages = await asyncio.gather(*(fetch_page(offset) for offset in range(start, end, page_size)))
+    count = max((page.get("count", 0) for page in pages), default=0)
+    return count, [row for page in pages for row in page.get("results", [])]
+
+
+# Export settings that don't vary between export_data calls
+_EXPORT_SETTINGS = MappingProxyType(
+    {
+        "fields_from_all_versions": True,
+        "group_sep": "/",
+        "multiple_select": "both",
+    }
+)
+
+
+async def _run_export(form_uid: str, export_type: str, include_labels: bool) -> dict[str, Any] | None:
+    """Create a data export and wait for it to finish.
+
+    Returns:
+        The final export status payload, or None if it was still
+        processing after 30 seconds.
+    """
+    client = get_client()
+    # Create export
+    response = await _request_with_retry(
+        client,
+        "POST",
+        f"{ASSETS_PATH}{form_uid}/exports/",
+        json={**_EXPORT_SETTINGS, "hierarchy_in_labels": include_labels, "type": export_type},
+        timeout=30.0,
+    )
+    response.raise_for_status()
+    export_uid = _loads(response.content).get("uid")
+
+    # Poll for completion (max 30 seconds)
+    return await _poll_until(
+        client,
+        f"{ASSETS_PATH}{form_uid}/exports/{export_uid}/",
+        deadline_s=30.0,
+    )
+
+
+async def _download_to_file(client: httpx.AsyncClient, url: str, path: str) -> int:
+    """Stream a download to a local file, creating parent directories as needed.
+
+    The body is written in 64 KiB chunks as it arrives instead of being
+    buffered in memory. It goes to a ".part" file that is moved into
+    place once complete, so a failed download never leaves a truncated
+    file at `path`. Export results are often served from separate file
+    storage, so redirects are followed, and the API token is only sent
+    when `url` is on the Kobo server (httpx also drops it when a redirect
+    leaves the server). Pre-signed storage URLs carry their own
+    credentials and reject an Authorization header anyway.
+
+    Returns:
+        The number of bytes written.
+    """
+    parent_dir = os.path.dirname(path)
+    if parent_dir:
+        await anyio.to_thread.run_sync(lambda: os.makedirs(parent_dir, exist_ok=True))
+
+    part = anyio.Path(f"{path}.part")
+    total = 0
+    response = await _request_with_retry(
+        client,
+        "GET",
+        url,
+        stream=True,
+        follow_redirects=True,
+        authenticated=_is_kobo_url(url),
+        timeout=DOWNLOAD_TIMEOUT,
+    )
+    try:
+        response.raise_for_status()
+        async with await part.open("wb") as f:
+            async for chunk in response.aiter_bytes(64 * 1024):
+                await f.write(chunk)
+                total += len(chunk)
+        await part.replace(path)
+    except BaseException:
+        with anyio.CancelScope(shield=True):
+            await part.unlink(missing_ok=True)
+        raise
+    finally:
+        with anyio.CancelScope(shield=True):
+            await response.aclose()
+    return total
+
+
+# Escapes for quoted multipart header parameters, as httpx (and HTML5) use
+_FORM_PARAM_ESCAPES = str.maketrans(
+    {'"': "%22", "\\": "\\\\", **{chr(c): f"%{c:02X}" for c in range(0x20) if c != 0x1B}}
+)
+
+
+class _MultipartUpload:
+    """A multipart/form-data body that streams one file from disk.
+
+    httpx's own multipart encoder reads files synchronously on the event
+    loop, so the body is framed here and the file is read in 64 KiB
+    chunks through anyio's worker threads instead. Each iteration reopens
+    the file, so a retried request sends the whole body again.
+    """
+
+    def __init__(self, file_path: str, size: int, content_type: str, fields: Mapping[str, str]) -> None:
+        self._path = file_path
+        boundary = os.urandom(16).hex()
+        parts = []
+        for name, value in fields.items():
+            quoted = name.translate(_FORM_PARAM_ESCAPES)
+            parts.append(
+                f'--{boundary}\r\nContent-Disposition: form-data; name="{quoted}"\r\n\r\n{value}\r\n'
+            )
+        filename = os.path.basename(file_path).translate(_FORM_PARAM_ESCAPES)
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+            f"Content-Type: {content_type}\r\n\r\n"
+        )
+        self._head = "".join(parts).encode()
+        self._tail = f"\r\n--{boundary}--\r\n".encode()
+        self.headers = {
+            "Content-Type": f"multipart/form-data; boundary={boundary}",
+            "Content-Length": str(len(self._head) + size + len(self._tail)),
+        }
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        yield self._head
+        async with await anyio.open_file(self._path, "rb") as f:
+            while chunk := await f.read(64 * 1024):
+                yield chunk
+        yield self._tail
+
+
+async def _xlsform_upload(file_path: str, fields: Mapping[str, str]) -> _MultipartUpload:
+    """Build a streamed multipart upload of an XLSForm with the given form fields."""
+    size = (await anyio.Path(file_path).stat()).st_size
+    return _MultipartUpload(file_path, size, XLSX_CONTENT_TYPE, fields)
+
+
+def _deployed_asset(deploy_response: httpx.Response) -> dict[str, Any] | None:
+    """Get the asset embedded in a deployment response, if it has deployment links.
+
+    The deployment has already happened by the time this is called, so an
+    empty or unexpected body is treated as "no embedded asset" rather than
+    an error; callers then read the asset separately.
+    """
+    try:
+        body = _loads(deploy_response.content)
+    except ValueError:  # Also covers orjson.JSONDecodeError
+        return None
+    asset = body.get("asset") if isinstance(body, dict) else None
+    if isinstance(asset, dict) and "deployment__links" in asset:
+        return asset
+    return None
+
+
+def _match_enketo_url(assets: Iterable[dict[str, Any]], target: str) -> dict[str, Any] | None:
+    """Return the first asset with a deployment link equal to target, if any."""
+    for asset in assets:
+        links = asset.get("deployment__links", {}) or {}
+        if target in {u.rstrip("/") for u in links.values() if isinstance(u, str)}:
+            return asset
+    return None
+
+
+def _resolved(asset: dict[str, Any]) -> str:
+    """Format a resolve_form match."""
+    return _dumps(
+        {
+            "uid": asset.get("uid"),
+            "name": asset.get("name"),
+            "deployment_links": asset.get("deployment__links", {}) or {},
+        },
+    )
+
+
+def _format_form(data: dict[str, Any]) -> dict[str, Any]:
+    """Extract the form details reported by get_form from an asset."""
     return {
-        "uid": asset.get("uid"),
-        "name": asset.get("name"),
-        "asset_type": asset.get("asset_type"),
-        "deployment_status": asset.get("deployment_status"),
-        "submission_count": asset.get("deployment__submission_count", 0),
-        "date_created": asset.get("date_created"),
-        "date_modified": asset.get("date_modified"),
-        "owner": asset.get("owner__username"),
+        "uid": data.get("uid"),
+        "name": data.get("name"),
+        "deployment_status": data.get("deployment_status"),
+        "deployment_links": data.get("deployment__links", {}),
+        "submission_count": data.get("deployment__submission_count", 0),
+        "date_created": data.get("date_created"),
+        "date_modified": data.get("date_modified"),
+        "owner": data.get("owner__username"),
+        "content": data.get("content"),  # Contains survey structure
     }
 
 
@@ -42,12 +666,14 @@ WORKFLOWS = {
 
 TOOLS:
   info          — Show this help. Use topic="translate", "deploy", or "data" for details.
-  list_forms    — List all forms/surveys. Returns uid, name, status, submission count.
+  list_forms    — List forms/surveys (paginated). Returns uid, name, status, submission count.
   get_form      — Get a form's JSON structure (questions, choices, settings).
   export_form   — Download a form as an XLSForm (.xlsx) file for editing.
   deploy_form   — Upload and deploy a new XLSForm (.xlsx).
   replace_form  — Replace an existing form's definition (preserves uid & submissions).
   get_submissions — Fetch submission data with pagination and filtering.
+  get_form_with_submissions — Get a form's structure and submissions together in one call.
+  get_submissions_bulk — Fetch many submissions at once as concurrent pages.
   export_data   — Export submission data as CSV or XLS.
 
 WORKFLOWS (use info with topic for step-by-step):
@@ -114,6 +740,16 @@ OPTION A — Fetch submissions directly (good for small datasets or filtering):
 OPTION B — Export as CSV/XLS (good for large datasets or analysis):
   export_data(form_uid="aBC123xYz", export_type="csv")
   → Returns a download URL for the export file
+  export_data(form_uid="aBC123xYz", export_type="csv", save_to="/path/to/data.csv")
+  → Downloads the finished export straight to a local file
+
+OPTION C — Form structure and data together (good for summarizing a form):
+  get_form_with_submissions(form_uid="aBC123xYz", limit=100)
+  → Returns the get_form details and submissions in one JSON document
+
+OPTION D — Bulk pull when the submission count is known (e.g. from list_forms):
+  get_submissions_bulk(form_uid="aBC123xYz", total=5000, page_size=1000)
+  → Requests all pages concurrently and returns them merged in order
 
 TIPS:
   - get_submissions supports pagination via limit/start
@@ -121,6 +757,8 @@ TIPS:
   - Set include_labels=True (default) for human-readable column headers
   - For large forms, export_data is more efficient than paginating through get_submissions""",
 }
+_WORKFLOW_KEYS = frozenset(WORKFLOWS)
+_WORKFLOW_KEYS_STR = ", ".join(WORKFLOWS)
 
 
 @mcp.tool()
@@ -141,42 +779,48 @@ async def info(topic: str | None = None) -> str:
     Returns:
         Workflow documentation as text.
     """
-    key = (topic or "overview").lower().strip()
-    if key not in WORKFLOWS:
-        return f"Unknown topic: {topic}. Available topics: {', '.join(WORKFLOWS.keys())}"
+    key = topic.lower().strip() if topic else "overview"
+    if key not in _WORKFLOW_KEYS:
+        return f"Unknown topic: {topic}. Available topics: {_WORKFLOW_KEYS_STR}"
     return WORKFLOWS[key]
 
 
 @mcp.tool()
-async def list_forms(search: str | None = None) -> str:
-    """List all KoboToolbox forms/surveys.
+async def list_forms(search: str | None = None, limit: int = 100, start: int = 0) -> str:
+    """List KoboToolbox forms/surveys.
 
     Use this as a starting point to find form UIDs for other tools.
     Call info(topic="translate") or info(topic="data") for workflow guidance.
 
     Args:
         search: Optional search term to filter forms by name.
+        limit: Maximum number of forms to return (default 100).
+        start: Offset for pagination (default 0).
 
     Returns:
-        JSON list of forms with uid, name, status, and submission count.
+        JSON object with the total count, next_offset (null on the last
+        page), and results: forms with uid, name, status, and submission count.
     """
-    params: dict[str, Any] = {"asset_type": "survey"}
+    params: dict[str, Any] = {
+        "asset_type": "survey",
+        "fields": LIST_FORMS_FIELDS,
+        "limit": limit,
+        "offset": start,
+    }
     if search:
         params["q"] = search
 
-    async with httpx.AsyncClient() as client:
-        response = await client.get(
-            f"{KOBO_SERVER}/api/v2/assets/",
-            headers=get_headers(),
-            params=params,
-            timeout=30.0,
-        )
-        response.raise_for_status()
-        data = response.json()
+    data = _loads(await _cached_get(ASSETS_PATH, params))
 
     results = data.get("results", [])
-    forms = [format_asset(asset) for asset in results]
-    return json.dumps(forms, indent=2)
+    forms = list(map(format_asset, results))
+    return _dumps(
+        {
+            "count": data.get("count", len(forms)),
+            "next_offset": start + len(results) if data.get("next") else None,
+            "results": forms,
+        },
+    )
 
 
 @mcp.tool()
@@ -192,28 +836,8 @@ async def get_form(form_uid: str) -> str:
     Returns:
         JSON object with form details including questions/fields.
     """
-    async with httpx.AsyncClient() as client:
-        response = await client.get(
-            f"{KOBO_SERVER}/api/v2/assets/{form_uid}/",
-            headers=get_headers(),
-            timeout=30.0,
-        )
-        response.raise_for_status()
-        data = response.json()
-
-    # Extract key information
-    result = {
-        "uid": data.get("uid"),
-        "name": data.get("name"),
-        "deployment_status": data.get("deployment_status"),
-        "deployment_links": data.get("deployment__links", {}),
-        "submission_count": data.get("deployment__submission_count", 0),
-        "date_created": data.get("date_created"),
-        "date_modified": data.get("date_modified"),
-        "owner": data.get("owner__username"),
-        "content": data.get("content"),  # Contains survey structure
-    }
-    return json.dumps(result, indent=2)
+    data = _loads(await _cached_get(f"{ASSETS_PATH}{form_uid}/", {"fields": GET_FORM_FIELDS}))
+    return _dumps(_format_form(data))
 
 
 @mcp.tool()
@@ -233,30 +857,35 @@ async def resolve_form(enketo_url: str) -> str:
     # Normalize: strip trailing slashes
     target = enketo_url.strip().rstrip("/")
 
-    async with httpx.AsyncClient() as client:
-        response = await client.get(
-            f"{KOBO_SERVER}/api/v2/assets/",
-            headers=get_headers(),
-            params={"asset_type": "survey"},
-            timeout=30.0,
-        )
-        response.raise_for_status()
-        data = response.json()
-
-    for asset in data.get("results", []):
-        links = asset.get("deployment__links", {}) or {}
-        for _key, url in links.items():
-            if isinstance(url, str) and url.rstrip("/") == target:
-                return json.dumps(
-                    {
-                        "uid": asset.get("uid"),
-                        "name": asset.get("name"),
-                        "deployment_links": links,
-                    },
-                    indent=2,
-                )
-
-    return json.dumps({"error": f"No form found matching Enketo URL: {enketo_url}"})
+    # Try a server-side search on the Enketo slug first; it usually
+    # returns a single asset instead of the whole catalog
+    slug = target.rsplit("/", 1)[-1]
+    if slug:
+        params = {"asset_type": "survey", "fields": RESOLVE_FORM_FIELDS, "q": slug}
+        data = _loads(await _cached_get(ASSETS_PATH, params))
+        if (asset := _match_enketo_url(data.get("results", []), target)) is not None:
+            return _resolved(asset)
+
+    # Fall back to walking the asset pages, stopping at the first match
+    start = 0
+    while True:
+        params = {
+            "asset_type": "survey",
+            "fields": RESOLVE_FORM_FIELDS,
+            "limit": RESOLVE_PAGE_SIZE,
+            "offset": start,
+        }
+        data = _loads(await _cached_get(ASSETS_PATH, params))
+        results = data.get("results", [])
+
+        if (asset := _match_enketo_url(results, target)) is not None:
+            return _resolved(asset)
+
+        if not results or not data.get("next"):
+            break
+        start += len(results)
+
+    return _dumps({"error": f"No form found matching Enketo URL: {enketo_url}"})
 
 
 @mcp.tool()
@@ -279,43 +908,29 @@ async def export_form(form_uid: str, output_path: str) -> str:
     Returns:
         JSON object with form_uid, output_path, and form name.
     """
-    import os.path
-
-    # Create parent directories if needed
-    parent_dir = os.path.dirname(output_path)
-    if parent_dir:
-        os.makedirs(parent_dir, exist_ok=True)
-
-    async with httpx.AsyncClient() as client:
-        # Get form metadata first (for the name in the response)
-        meta_response = await client.get(
-            f"{KOBO_SERVER}/api/v2/assets/{form_uid}/",
-            headers=get_headers(),
-            timeout=30.0,
-        )
-        meta_response.raise_for_status()
-        meta = meta_response.json()
-
-        # Download the XLSForm binary
-        response = await client.get(
-            f"{KOBO_SERVER}/api/v2/assets/{form_uid}.xls",
-            headers=get_headers(),
-            timeout=60.0,
-        )
-        response.raise_for_status()
-
-        # Write binary content to file
-        with open(output_path, "wb") as f:
-            f.write(response.content)
-
-    return json.dumps(
+    # Stream the XLSForm binary to disk while reading the form name
+    # (for the response), so the two requests overlap
+    download = asyncio.create_task(
+        _download_to_file(get_client(), f"{ASSETS_PATH}{form_uid}.xls", output_path)
+    )
+    try:
+        meta_body = await _cached_get(f"{ASSETS_PATH}{form_uid}/", {"fields": "name"})
+    except BaseException:
+        # Don't let the download finish writing the file after we report
+        # failure; cancelling it removes its partial file
+        download.cancel()
+        await asyncio.gather(download, return_exceptions=True)
+        raise
+    await download
+    name = _loads(meta_body).get("name")
+
+    return _dumps(
         {
             "form_uid": form_uid,
-            "name": meta.get("name"),
+            "name": name,
             "output_path": output_path,
             "status": "downloaded",
         },
-        indent=2,
     )
 
 
@@ -328,6 +943,9 @@ async def get_submissions(
 ) -> str:
     """Get submissions (responses) for a form.
 
+    Large requests (limit above 1000) are split into pages that are
+    fetched concurrently and returned as a single list.
+
     Args:
         form_uid: The unique identifier (uid) of the form.
         limit: Maximum number of submissions to return (default 100).
@@ -335,28 +953,93 @@ async def get_submissions(
         query: Optional JSON query string to filter submissions (e.g., '{"field": "value"}').
 
     Returns:
-        JSON object with count and list of submissions.
+        JSON object with count and list of submissions. Single-page
+        requests are passed through from the API as-is, so they may also
+        carry its next/previous pagination links.
     """
+    client = get_client()
+    if limit > SUBMISSIONS_PAGE_SIZE:
+        count, results = await _fetch_submissions(client, form_uid, limit, start, query)
+        return _dumps({"count": count, "results": results})
+
     params: dict[str, Any] = {"limit": limit, "start": start}
     if query:
         params["query"] = query
+    response = await _retrying_get(
+        client,
+        f"{ASSETS_PATH}{form_uid}/data/",
+        params=params,
+        timeout=DOWNLOAD_TIMEOUT,
+    )
+    response.raise_for_status()
+    data = _loads(response.content)
 
-    async with httpx.AsyncClient() as client:
-        response = await client.get(
-            f"{KOBO_SERVER}/api/v2/assets/{form_uid}/data/",
-            headers=get_headers(),
-            params=params,
-            timeout=60.0,
-        )
-        response.raise_for_status()
-        data = response.json()
+    # A single page is already in the shape we return, so hand it back as-is
+    if (body := _passthrough(response, data, ("count", "results"))) is not None:
+        return body
+    return _dumps({"count": data.get("count", 0), "results": data.get("results", [])})
 
-    return json.dumps(
-        {"count": data.get("count", 0), "results": data.get("results", [])},
-        indent=2,
+
+@mcp.tool()
+async def get_form_with_submissions(form_uid: str, limit: int = 100) -> str:
+    """Get a form's structure and its submissions in a single call.
+
+    Returns what get_form() and get_submissions() would, fetched
+    concurrently. Prefer this over calling both tools when you need to
+    summarize or analyze a form together with its data.
+
+    Args:
+        form_uid: The unique identifier (uid) of the form.
+        limit: Maximum number of submissions to return (default 100).
+
+    Returns:
+        JSON object with "form" (as from get_form) and "submissions"
+        (count and list of submissions).
+    """
+    client = get_client()
+    form_body, (count, results) = await asyncio.gather(
+        _cached_get(f"{ASSETS_PATH}{form_uid}/", {"fields": GET_FORM_FIELDS}),
+        _fetch_submissions(client, form_uid, limit),
+    )
+
+    return _dumps(
+        {
+            "form": _format_form(_loads(form_body)),
+            "submissions": {"count": count, "results": results},
+        },
     )
 
 
+@mcp.tool()
+async def get_submissions_bulk(
+    form_uid: str,
+    total: int,
+    page_size: int = SUBMISSIONS_PAGE_SIZE,
+) -> str:
+    """Get the first `total` submissions for a form, fetching every page at once.
+
+    Unlike get_submissions, this doesn't wait for a first page to learn
+    the submission count: all pages of `page_size` are requested
+    concurrently and merged in order. Use it when you already know
+    roughly how many submissions a form has (e.g. from list_forms).
+
+    Args:
+        form_uid: The unique identifier (uid) of the form.
+        total: Number of submissions to fetch, from the first one (at least 1).
+        page_size: Submissions per request (default and maximum 1000).
+
+    Returns:
+        JSON object with count (the form's total) and list of submissions,
+        or an error if total is below 1.
+    """
+    if total < 1:
+        # No page would be requested, so there'd be no count to report
+        return _dumps({"error": f"total must be at least 1, got {total}"})
+    page_size = max(1, min(page_size, SUBMISSIONS_PAGE_SIZE))
+    count, results = await _fetch_submission_pages(get_client(), form_uid, 0, total, page_size)
+    return _dumps({"count": count, "results": results})
+
+
 @mcp.tool()
 async def deploy_form(file_path: str, form_name: str | None = None) -> str:
     """Upload and deploy a NEW XLSForm to KoboToolbox.
@@ -374,53 +1057,58 @@ async def deploy_form(file_path: str, form_name: str | None = None) -> str:
     Returns:
         JSON object with uid, enketo_url (web form link), and management_url.
     """
-    import os.path
-
-    if not os.path.exists(file_path):
-        return json.dumps({"error": f"File not found: {file_path}"})
+    # File checks run in a worker thread to keep the event loop free
+    if not await anyio.to_thread.run_sync(os.path.exists, file_path):
+        return _dumps({"error": f"File not found: {file_path}"})
 
     name = form_name or os.path.splitext(os.path.basename(file_path))[0]
 
-    async with httpx.AsyncClient() as client:
-        # Step 1: Upload the XLSForm to create an asset
-        with open(file_path, "rb") as f:
-            files = {"file": (os.path.basename(file_path), f, "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")}
-            data = {"name": name, "asset_type": "survey"}
-            response = await client.post(
-                f"{KOBO_SERVER}/api/v2/assets/",
-                headers=get_headers(),
-                files=files,
-                data=data,
-                timeout=60.0,
-            )
-            response.raise_for_status()
-            asset = response.json()
-
-        uid = asset.get("uid")
-
-        # Step 2: Deploy the form
-        deploy_response = await client.post(
-            f"{KOBO_SERVER}/api/v2/assets/{uid}/deployment/",
-            headers=get_headers(),
-            json={"active": True},
-            timeout=30.0,
-        )
-        deploy_response.raise_for_status()
-
-        # Step 3: Get asset info including enketo URL
-        asset_response = await client.get(
-            f"{KOBO_SERVER}/api/v2/assets/{uid}/",
-            headers=get_headers(),
-            timeout=30.0,
+    client = get_client()
+    # Step 1: Upload the XLSForm to create an asset. The file is streamed
+    # from disk rather than read into memory.
+    upload = await _xlsform_upload(file_path, {"name": name, "asset_type": "survey"})
+    response = await _request_with_retry(
+        client,
+        "POST",
+        ASSETS_PATH,
+        content=upload,
+        headers=upload.headers,
+        timeout=60.0,
+    )
+    response.raise_for_status()
+    asset = _loads(response.content)
+
+    uid = asset.get("uid")
+
+    # Step 2: Deploy the form
+    deploy_response = await _request_with_retry(
+        client,
+        "POST",
+        f"{ASSETS_PATH}{uid}/deployment/",
+        json={"active": True},
+        timeout=30.0,
+    )
+    deploy_response.raise_for_status()
+
+    # Step 3: Get asset info including enketo URL. The deployment response
+    # normally embeds the deployed asset; only fetch it if it doesn't.
+    asset_data = _deployed_asset(deploy_response)
+    if asset_data is None:
+        asset_response = await _retrying_get(
+            client,
+            f"{ASSETS_PATH}{uid}/",
+            timeout=GET_TIMEOUT,
         )
         asset_response.raise_for_status()
-        asset_data = asset_response.json()
+        asset_data = _loads(asset_response.content)
+
+    _invalidate_cache()
 
     # Extract enketo submission URL from deployment links
     deployment_links = asset_data.get("deployment__links", {})
     enketo_url = deployment_links.get("url") or deployment_links.get("offline_url")
 
-    return json.dumps(
+    return _dumps(
         {
             "uid": uid,
             "name": name,
@@ -428,7 +1116,6 @@ async def deploy_form(file_path: str, form_name: str | None = None) -> str:
             "enketo_url": enketo_url,
             "management_url": f"{KOBO_SERVER}/#/forms/{uid}",
         },
-        indent=2,
     )
 
 
@@ -454,88 +1141,68 @@ async def replace_form(form_uid: str, file_path: str) -> str:
     Returns:
         JSON object with uid, enketo_url, and management_url.
     """
-    import asyncio
-    import os.path
-
-    if not os.path.exists(file_path):
-        return json.dumps({"error": f"File not found: {file_path}"})
-
-    async with httpx.AsyncClient() as client:
-        # Step 1: Create an import task targeting the existing asset
-        with open(file_path, "rb") as f:
-            files = {"file": (os.path.basename(file_path), f, "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")}
-            data = {"destination": f"{KOBO_SERVER}/api/v2/assets/{form_uid}/"}
-            response = await client.post(
-                f"{KOBO_SERVER}/api/v2/imports/",
-                headers=get_headers(),
-                files=files,
-                data=data,
-                timeout=60.0,
-            )
-            response.raise_for_status()
-            import_task = response.json()
-
-        import_uid = import_task.get("uid")
-
-        # Step 2: Poll for import completion (max 60 seconds)
-        for _ in range(60):
-            status_response = await client.get(
-                f"{KOBO_SERVER}/api/v2/imports/{import_uid}/",
-                headers=get_headers(),
-                timeout=30.0,
-            )
-            status_response.raise_for_status()
-            status_data = status_response.json()
-
-            if status_data.get("status") == "complete":
-                break
-            elif status_data.get("status") == "error":
-                return json.dumps(
-                    {"status": "error", "message": status_data.get("messages", {})},
-                    indent=2,
-                )
-
-            await asyncio.sleep(1)
-        else:
-            return json.dumps(
-                {"status": "timeout", "message": "Import is still processing."},
-                indent=2,
-            )
+    # File checks run in a worker thread to keep the event loop free
+    if not await anyio.to_thread.run_sync(os.path.exists, file_path):
+        return _dumps({"error": f"File not found: {file_path}"})
+
+    client = get_client()
+    # Step 1: Create an import task targeting the existing asset. The file
+    # is streamed from disk rather than read into memory. The destination
+    # is read by the server, so it must be an absolute URL.
+    upload = await _xlsform_upload(file_path, {"destination": f"{KOBO_SERVER}/api/v2/assets/{form_uid}/"})
+    response = await _request_with_retry(
+        client,
+        "POST",
+        IMPORTS_PATH,
+        content=upload,
+        headers=upload.headers,
+        timeout=60.0,
+    )
+    response.raise_for_status()
+    import_task = _loads(response.content)
 
-        # Step 3: Redeploy the form to make changes live
-        # PATCH with version_id triggers actual redeployment of new content
-        # First get the current asset version
-        version_response = await client.get(
-            f"{KOBO_SERVER}/api/v2/assets/{form_uid}/",
-            headers=get_headers(),
-            timeout=30.0,
-        )
-        version_response.raise_for_status()
-        version_data = version_response.json()
-        version_id = version_data.get("version_id")
-
-        deploy_response = await client.patch(
-            f"{KOBO_SERVER}/api/v2/assets/{form_uid}/deployment/",
-            headers=get_headers(),
-            json={"active": True, "version_id": version_id},
-            timeout=30.0,
-        )
-        deploy_response.raise_for_status()
+    import_uid = import_task.get("uid")
 
-        # Step 4: Get updated asset info
-        asset_response = await client.get(
-            f"{KOBO_SERVER}/api/v2/assets/{form_uid}/",
-            headers=get_headers(),
-            timeout=30.0,
-        )
-        asset_response.raise_for_status()
-        asset = asset_response.json()
+    # Step 2: Poll for import completion (max 60 seconds)
+    status_data = await _poll_until(
+        client, f"{IMPORTS_PATH}{import_uid}/", deadline_s=60.0
+    )
+    if status_data is None:
+        return _dumps({"status": "timeout", "message": "Import is still processing."})
+    if status_data.get("status") == "error":
+        return _dumps({"status": "error", "message": status_data.get("messages", {})})
+
+    # Step 3: Get the current asset version to redeploy
+    # PATCH with version_id triggers actual redeployment of new content
+    version_response = await _retrying_get(
+        client,
+        f"{ASSETS_PATH}{form_uid}/",
+        timeout=GET_TIMEOUT,
+    )
+    version_response.raise_for_status()
+    version_data = _loads(version_response.content)
+    version_id = version_data.get("version_id")
+
+    # Step 4: Redeploy. The asset read above already has the name, links
+    # and submission count we report (deploying doesn't change them), so
+    # prefer the asset embedded in the deployment response and fall back
+    # to it rather than fetching the asset again.
+    deploy_url = f"{ASSETS_PATH}{form_uid}/deployment/"
+    deploy_body = {"active": True, "version_id": version_id}
+    # Rate-limited PATCHes are retried by the request layer; other errors
+    # won't change on a resend, so they're raised as they are
+    deploy_response = await _request_with_retry(
+        client, "PATCH", deploy_url, json=deploy_body, timeout=30.0
+    )
+    deploy_response.raise_for_status()
+    asset = _deployed_asset(deploy_response) or version_data
+    _invalidate_cache()
 
     # Extract enketo submission URL from deployment links
     deployment_links = asset.get("deployment__links", {})
     enketo_url = deployment_links.get("url") or deployment_links.get("offline_url")
 
-    return json.dumps(
+    return _dumps(
         {
             "uid": form_uid,
             "name": asset.get("name"),
@@ -544,7 +1211,6 @@ async def replace_form(form_uid: str, file_path: str) -> str:
             "enketo_url": enketo_url,
             "management_url": f"{KOBO_SERVER}/#/forms/{form_uid}",
         },
-        indent=2,
     )
 
 
@@ -553,6 +1219,7 @@ async def export_data(
     form_uid: str,
     export_type: str = "csv",
     include_labels: bool = True,
+    save_to: str | None = None,
 ) -> str:
     """Create and download a data export for a form.
 
@@ -560,71 +1227,64 @@ async def export_data(
         form_uid: The unique identifier (uid) of the form.
         export_type: Export format - 'csv' or 'xls' (default 'csv').
         include_labels: Include question labels in headers (default True).
+        save_to: Optional local file path. If given, the finished export is
+                 streamed straight to this file instead of returning its URL.
 
     Returns:
-        JSON object with export download URL or the data itself for small exports.
+        JSON object with the export download URL, or the saved path and size
+        when save_to is given.
     """
-    export_settings = {
-        "fields_from_all_versions": True,
-        "group_sep": "/",
-        "hierarchy_in_labels": include_labels,
-        "multiple_select": "both",
-        "type": export_type,
-    }
-
-    async with httpx.AsyncClient() as client:
-        # Create export
-        response = await client.post(
-            f"{KOBO_SERVER}/api/v2/assets/{form_uid}/exports/",
-            headers=get_headers(),
-            json=export_settings,
-            timeout=30.0,
+    # Concurrent calls for the same export share one server-side export
+    key = (form_uid, export_type, include_labels)
+    task = _inflight_exports.get(key)
+    if task is None:
+        task = asyncio.create_task(_run_export(*key))
+        _inflight_exports[key] = task
+        task.add_done_callback(lambda _: _inflight_exports.pop(key, None))
+    # Shield so one caller giving up doesn't cancel the export for the others
+    status_data = await asyncio.shield(task)
+
+    if status_data is None:
+        return _dumps(
+            {"status": "pending", "message": "Export is still processing. Try again later."},
+        )
+    if status_data.get("status") == "error":
+        return _dumps({"status": "error", "message": status_data.get("messages", {})})
+
+    download_url = status_data.get("result")
+    if save_to and download_url:
+        total = await _download_to_file(get_client(), download_url, save_to)
+        return _dumps(
+            {
+                "status": "complete",
+                "path": save_to,
+                "bytes": total,
+                "type": export_type,
+            },
         )
-        response.raise_for_status()
-        export_data = response.json()
-
-        export_uid = export_data.get("uid")
-
-        # Poll for completion (max 30 seconds)
-        import asyncio
 
-        for _ in range(30):
-            status_response = await client.get(
-                f"{KOBO_SERVER}/api/v2/assets/{form_uid}/exports/{export_uid}/",
-                headers=get_headers(),
-                timeout=30.0,
-            )
-            status_response.raise_for_status()
-            status_data = status_response.json()
-
-            if status_data.get("status") == "complete":
-                return json.dumps(
-                    {
-                        "status": "complete",
-                        "download_url": status_data.get("result"),
-                        "type": export_type,
-                    },
-                    indent=2,
-                )
-            elif status_data.get("status") == "error":
-                return json.dumps(
-                    {"status": "error", "message": status_data.get("messages", {})},
-                    indent=2,
-                )
-
-            await asyncio.sleep(1)
-
-    return json.dumps(
-        {"status": "pending", "message": "Export is still processing. Try again later."},
-        indent=2,
+    return _dumps(
+        {
+            "status": "complete",
+            "download_url": download_url,
+            "type": export_type,
+        },
     )
 
 
 def main():
     """Run the MCP server."""
+    # Fail at startup rather than on the first tool call
+    if not KOBO_API_TOKEN:
+        print("KOBO_API_TOKEN environment variable is not set", file=sys.stderr)
+        sys.exit(2)
     # Log to stderr (stdout is reserved for MCP protocol)
     print("Starting KoboToolbox MCP server...", file=sys.stderr)
-    mcp.run(transport="stdio")
+    if uvloop is not None:
+        # Same as mcp.run(transport="stdio"), but on the libuv event loop
+        anyio.run(mcp.run_stdio_async, backend_options={"use_uvloop": True})
+    else:
+        mcp.run(transport="stdio")
 
 
 if __name__ == "__main__":